@@ -6,6 +6,8 @@ from wtforms import SelectField
 from datetime import datetime
 
 from models import User, Transaction, db, TaskSchedule
+from routing import read_only, use_replica, pin_primary
+from expiry import schedule_expiry
 
 
 CHOISE_STATUS = [
@@ -23,6 +25,7 @@ CHOISE_ROLE = [
 
 class DashboardView(base.BaseView):
     @expose('/')
+    @read_only
     def index(self):
         user_count = User.query.count()
         transaction_count = Transaction.query.count()
@@ -30,8 +33,10 @@ class DashboardView(base.BaseView):
         daily_total = db.session.query(db.func.sum(Transaction.amount)).filter(db.func.date(Transaction.created_at) == today).scalar() or 0.0
         last_transactions = Transaction.query.order_by(Transaction.created_at.desc()).limit(5).all()
         
-        refresh_intervals = [0, 10, 15, 30, 60]
+        refresh_intervals = [0, 10, 15, 30, 60, 300, 600]
 
+        # Расписание читаем и меняем в основной базе: на отстающей реплике строки может не быть
+        pin_primary()
         task_schedule = TaskSchedule.query.first()
         if not task_schedule:
             task_schedule = TaskSchedule(interval_seconds=refresh_intervals[0])
@@ -58,15 +63,25 @@ class DashboardView(base.BaseView):
 
 
 class BaseModelView(ModelView):
+    # Списки и карточки только читают данные - отправляем их на реплики
+    read_only_views = ('index_view', 'details_view')
+
     def is_accessible(self):
         return current_user.is_authenticated
 
+    def _handle_view(self, name, **kwargs):
+        # Сначала проверка доступа: current_user и его роль читаются из основной базы
+        response = super()._handle_view(name, **kwargs)
+        if response is None and name in self.read_only_views:
+            use_replica()
+        return response
+
     def inaccessible_callback(self, username, **kwargs):
         return redirect(url_for('login'))
 
 
 class UserAdmin(BaseModelView):
-    column_list = ['username', 'role', 'balance', 'commission_rate', 'webhook_url']
+    column_list = ['username', 'role', 'balance', 'commission_rate', 'transaction_ttl', 'webhook_url']
     can_create = False
     can_edit = True
     can_delete = True
@@ -146,6 +161,11 @@ class TransactionAdmin(BaseModelView):
             else:
                 raise Exception("Пользователь не аутентифицирован. Невозможно установить user_id.")
         return super().on_model_change(form, model, is_created)
+
+    def after_model_change(self, form, model, is_created):
+        if is_created and model.status == 'pending':
+            schedule_expiry(model)
+        return super().after_model_change(form, model, is_created)
     
     # Фильтрация транзакций для обычных пользователей
     def get_query(self):
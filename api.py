@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required, login_user
 
 from models import Transaction, db, User
+from routing import read_only
+from expiry import schedule_expiry, cancel_expiry
 
 
 api_blueprint = Blueprint('api', __name__)
@@ -122,6 +124,7 @@ def create_transaction():
 
         db.session.add(transaction)
         db.session.commit()
+        schedule_expiry(transaction)
 
         return jsonify({
             "message": "Транзакция создана",
@@ -195,6 +198,7 @@ def cancel_transaction():
 
         transaction.status = 'canceled'
         db.session.commit()
+        cancel_expiry(transaction.id)
 
         return jsonify({
             "message": "Транзакция отменена!",
@@ -209,6 +213,7 @@ def cancel_transaction():
 
 @api_blueprint.route('/check_transaction', methods=['GET'])
 @login_required
+@read_only
 def check_transactions():
     """
     Получение списка транзакций.
@@ -1,26 +1,47 @@
+import os
+
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-from flask_login import LoginManager, login_user
+from flask_login import LoginManager, login_user, user_logged_in
 from flasgger import Swagger
+from flask_migrate import Migrate
 from api import api_blueprint
 
 from models import User, db
 from admin import admin, setup_admin
-from commands import admin_cli
+from commands import admin_cli, transactions_cli
+from sessions import make_session_interface, rotate_session
 
 
 login_manager = LoginManager()
 login_manager.login_view = "login"
+migrate = Migrate()
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-def create_app():
+def dispose_engines(app):
+    """
+    Сбрасывает пулы соединений, унаследованные от родительского процесса после fork.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def create_app(config_object='config.Config'):
     app = Flask(__name__)
-    app.config.from_object('config.Config')
+    app.config.from_object(config_object)
+    if not app.config['SECRET_KEY']:
+        if not app.debug:
+            raise RuntimeError('SECRET_KEY не задан: укажите его в переменной окружения')
+        # Только для отладки: ключ живет до перезапуска процесса
+        app.config['SECRET_KEY'] = os.urandom(24).hex()
+    app.session_interface = make_session_interface(app)
+    user_logged_in.connect(rotate_session, app)
 
     # Инициализация расширений
     db.init_app(app)
+    migrate.init_app(app, db)
     login_manager.init_app(app)
     admin.init_app(app)
 
@@ -32,6 +53,7 @@ def create_app():
     
     # Регистрация команд CLI
     app.cli.add_command(admin_cli)
+    app.cli.add_command(transactions_cli)
     
     
     # Маршрут для webhookа
@@ -107,5 +129,6 @@ def create_app():
 
 
 if __name__ == '__main__':
+    os.environ.setdefault('FLASK_DEBUG', '1')
     app = create_app()
     app.run(debug=True)
@@ -0,0 +1,135 @@
+"""
+Сравнение пропускной способности веб-сервера и воркера Celery при 1, 4 и N процессах-воркерах.
+Число воркеров не привязано к ядрам: процессы распределяет планировщик ОС.
+
+Веб-сервер нагружается авторизованными запросами к /api/check_transaction (БД, сессия, логин).
+Нагрузку дает wrk, если он установлен, иначе - несколько процессов Python.
+
+Запуск из корня проекта (нужен запущенный Redis, SESSION_TYPE=redis и существующий пользователь):
+    python -m benchmarks.throughput --username admin --password secret --duration 10 --tasks 2000
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from celery import Celery
+
+from config import Config
+
+
+BIND = '127.0.0.1:8001'
+BASE_URL = f'http://{BIND}'
+URL = f'{BASE_URL}/api/check_transaction'
+
+
+def wait_for_server(timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{BASE_URL}/login', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('Сервер не запустился')
+
+
+def login(username, password):
+    """
+    Возвращает значение заголовка Cookie авторизованной сессии.
+    """
+    session = requests.Session()
+    response = session.post(f'{BASE_URL}/api/login', data={'username': username, 'password': password})
+    response.raise_for_status()
+    return '; '.join(f'{name}={value}' for name, value in session.cookies.items())
+
+
+def hammer(cookie, duration):
+    session = requests.Session()
+    session.headers['Cookie'] = cookie
+    deadline = time.monotonic() + duration
+    count = 0
+    while time.monotonic() < deadline:
+        session.get(URL).raise_for_status()
+        count += 1
+    return count
+
+
+def load_with_wrk(cookie, duration, clients):
+    output = subprocess.run(
+        ['wrk', f'-t{os.cpu_count() or 1}', f'-c{clients}', f'-d{int(duration)}s', '-H', f'Cookie: {cookie}', URL],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return float(re.search(r'Requests/sec:\s+([\d.]+)', output).group(1))
+
+
+def load_with_processes(cookie, duration, clients):
+    with ProcessPoolExecutor(clients) as pool:
+        total = sum(pool.map(hammer, [cookie] * clients, [duration] * clients))
+    return total / duration
+
+
+def bench_web(workers, duration, clients, username, password):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers), '-b', BIND,
+         '--access-logfile', '/dev/null'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server()
+        cookie = login(username, password)
+        if shutil.which('wrk'):
+            return load_with_wrk(cookie, duration, clients)
+        return load_with_processes(cookie, duration, clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_tasks(concurrency, count):
+    worker = subprocess.Popen(
+        [sys.executable, '-m', 'celery', '-A', 'tasks.celery', 'worker', '--loglevel=warning',
+         '--pool=prefork', f'--concurrency={concurrency}'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    client = Celery('benchmark', broker=Config.REDIS_URL, backend=Config.REDIS_URL)
+    try:
+        # Прогрев: дожидаемся, пока воркер начнет принимать задачи
+        client.send_task('tasks.expire_due_transactions').get(timeout=60)
+        started = time.perf_counter()
+        results = [client.send_task('tasks.expire_due_transactions') for _ in range(count)]
+        for result in results:
+            result.get(timeout=60)
+        return count / (time.perf_counter() - started)
+    finally:
+        worker.terminate()
+        worker.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10, help='Длительность нагрузки на веб-сервер, сек.')
+    parser.add_argument('--clients', type=int, default=os.cpu_count() or 1,
+                        help='Число одновременных HTTP-клиентов (процессов или соединений wrk).')
+    parser.add_argument('--username', required=True, help='Пользователь для авторизованных запросов.')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--tasks', type=int, default=2000, help='Число задач Celery в замере.')
+    args = parser.parse_args()
+
+    workers = sorted({1, 4, os.cpu_count() or 1})
+    print(f'{"воркеров":>8} {"запросов/сек":>14} {"задач/сек":>12}')
+    for n in workers:
+        rps = bench_web(n, args.duration, args.clients, args.username, args.password)
+        tps = bench_tasks(n, args.tasks)
+        print(f'{n:>8} {rps:>14.0f} {tps:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,25 @@
+import os
+import time
+from datetime import timedelta
+
+import click
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from flask.cli import AppGroup
+from sqlalchemy import insert, select
 
-from models import db, User
+from models import db, User, Transaction
+from expiry import schedule_expiry_many, transaction_ttl
 
 
 admin_cli = AppGroup('admin')
+transactions_cli = AppGroup('transactions')
+
+# Колонки, которые читаются из файла при импорте. Комиссия всегда пересчитывается.
+IMPORT_COLUMNS = ['created_at', 'user_id', 'amount', 'status']
+
 
 @admin_cli.command('create-admin')
 def create_admin():
@@ -16,3 +32,139 @@ def create_admin():
     db.session.add(admin_user)
     db.session.commit()
     print(f'Admin name: {username}\npassword: {password} создан.')
+
+
+def transaction_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('created_at', pa.timestamp('us')),
+        ('user_id', pa.int64()),
+        ('amount', pa.float64()),
+        ('commission', pa.float64()),
+        ('status', pa.string()),
+    ])
+
+
+def detect_format(path, file_format):
+    if file_format:
+        return file_format
+    return 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'csv'
+
+
+def report(action, rows, started):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else 0
+    click.echo(f'{action} строк: {rows} за {elapsed:.1f} сек ({rate:.0f} строк/сек)')
+
+
+@transactions_cli.command('export')
+@click.argument('path')
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'parquet']), help='По умолчанию - по расширению файла.')
+@click.option('--chunk-size', default=50000, show_default=True, help='Строк в одном блоке.')
+def export_transactions(path, file_format, chunk_size):
+    """
+    Выгружает транзакции в CSV или Parquet блоками по chunk-size строк.
+    """
+    schema = transaction_schema()
+    table = Transaction.__table__
+    query = select(*(table.c[name] for name in schema.names)).order_by(table.c.id)
+
+    if detect_format(path, file_format) == 'parquet':
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa_csv.CSVWriter(path, schema)
+
+    started = time.perf_counter()
+    rows = 0
+    try:
+        # Серверный курсор: в памяти держится только текущий блок
+        with db.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for partition in result.partitions():
+                columns = [pa.array(values, type=field.type) for values, field in zip(zip(*partition), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+                rows += len(partition)
+    finally:
+        writer.close()
+
+    report('Выгружено', rows, started)
+
+
+def read_batches(path, file_format, chunk_size):
+    schema = transaction_schema()
+    if file_format == 'parquet':
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=IMPORT_COLUMNS)
+        return
+
+    reader = pa_csv.open_csv(path, convert_options=pa_csv.ConvertOptions(
+        column_types={name: schema.field(name).type for name in IMPORT_COLUMNS},
+        include_columns=IMPORT_COLUMNS,
+    ))
+    for batch in reader:
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(offset, chunk_size)
+
+
+def validate_import(batches, user_ids):
+    """
+    Проверяет весь файл до вставки: пустые значения и неизвестные пользователи.
+    Так импорт не обрывается на середине с уже зафиксированной частью строк.
+    """
+    unknown = set()
+    try:
+        for batch in batches:
+            check_batch(batch, user_ids, unknown)
+    except (pa.ArrowException, OSError) as e:
+        raise click.ClickException(f'Некорректный файл: {e}')
+    if unknown:
+        raise click.ClickException(f'Неизвестные пользователи: {sorted(unknown)}')
+
+
+def check_batch(batch, user_ids, unknown):
+    for name in IMPORT_COLUMNS:
+        if batch.column(name).null_count:
+            raise click.ClickException(f'Пустые значения в колонке {name}')
+    user_index = pc.index_in(batch.column('user_id'), value_set=user_ids)
+    if user_index.null_count:
+        unknown.update(pc.unique(pc.filter(batch.column('user_id'), pc.is_null(user_index))).to_pylist())
+
+
+@transactions_cli.command('import')
+@click.argument('path')
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'parquet']), help='По умолчанию - по расширению файла.')
+@click.option('--chunk-size', default=50000, show_default=True, help='Строк в одной пачке вставки.')
+def import_transactions(path, file_format, chunk_size):
+    """
+    Загружает транзакции из CSV или Parquet пачками.
+    Файл сначала целиком проверяется, затем вставляется; при ошибке проверки ничего не записывается.
+    Комиссия считается по commission_rate пользователя для всей пачки сразу (пустая ставка - 0).
+    Транзакциям в статусе 'pending' ставятся таймеры истечения.
+    """
+    file_format = detect_format(path, file_format)
+    users = db.session.execute(select(User.id, User.commission_rate, User.transaction_ttl)).all()
+    ttls = {user.id: timedelta(seconds=transaction_ttl(user)) for user in users}
+    user_ids = pa.array([user.id for user in users], type=pa.int64())
+    rates = pc.fill_null(pa.array([user.commission_rate for user in users], type=pa.float64()), 0.0)
+
+    validate_import(read_batches(path, file_format, chunk_size), user_ids)
+
+    table = Transaction.__table__
+    started = time.perf_counter()
+    rows = 0
+    for batch in read_batches(path, file_format, chunk_size):
+        user_index = pc.index_in(batch.column('user_id'), value_set=user_ids)
+        commission = pc.multiply(batch.column('amount'), pc.take(rates, user_index))
+        records = pa.Table.from_batches([batch]).append_column('commission', commission).to_pylist()
+
+        with db.engine.begin() as connection:
+            ids = connection.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), records
+            ).scalars().all()
+        schedule_expiry_many({
+            transaction_id: record['created_at'] + ttls[record['user_id']]
+            for transaction_id, record in zip(ids, records)
+            if record['status'] == 'pending'
+        })
+        rows += batch.num_rows
+
+    report('Загружено', rows, started)
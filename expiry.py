@@ -0,0 +1,102 @@
+import logging
+import time
+from datetime import timedelta
+
+import redis
+from flask import current_app
+
+
+logger = logging.getLogger(__name__)
+
+# Отсортированное множество Redis: member - ID транзакции, score - время истечения (unix time)
+EXPIRY_KEY = 'transactions:expiry'
+
+# Атомарно забирает из множества транзакции, срок которых уже наступил
+POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+# Один клиент (и пул соединений) на процесс; после fork redis-py сам пересоздает соединения
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(current_app.config['REDIS_URL'])
+    return _client
+
+
+def transaction_ttl(user):
+    """
+    Время жизни транзакции в секундах: настройка пользователя или глобальная.
+    """
+    if user is not None and user.transaction_ttl:
+        return user.transaction_ttl
+    return current_app.config['TRANSACTION_TTL_SECONDS']
+
+
+def expires_at(transaction):
+    return transaction.created_at + timedelta(seconds=transaction_ttl(transaction.user))
+
+
+def schedule_expiry(transaction):
+    """
+    Ставит таймер истечения для транзакции.
+    Ошибка Redis не мешает созданию транзакции - ее подберет периодическая проверка.
+    """
+    try:
+        get_redis().zadd(EXPIRY_KEY, {transaction.id: expires_at(transaction).timestamp()})
+    except redis.RedisError as e:
+        logger.error(f"Ошибка постановки таймера для транзакции {transaction.id}: {str(e)}")
+
+
+def schedule_expiry_many(deadlines):
+    """
+    Ставит таймеры пачке транзакций одним ZADD: deadlines - {ID транзакции: время истечения}.
+    """
+    if not deadlines:
+        return
+    try:
+        get_redis().zadd(EXPIRY_KEY, {
+            transaction_id: deadline.timestamp() for transaction_id, deadline in deadlines.items()
+        })
+    except redis.RedisError as e:
+        logger.error(f"Ошибка постановки таймеров для {len(deadlines)} транзакций: {str(e)}")
+
+
+def cancel_expiry(transaction_id):
+    """
+    Снимает таймер истечения для транзакции.
+    """
+    try:
+        get_redis().zrem(EXPIRY_KEY, transaction_id)
+    except redis.RedisError as e:
+        logger.error(f"Ошибка снятия таймера для транзакции {transaction_id}: {str(e)}")
+
+
+def pop_due(limit):
+    """
+    Возвращает ID транзакций (не более limit), срок которых наступил, удаляя их из множества.
+    """
+    client = get_redis()
+    due = client.eval(POP_DUE_SCRIPT, 1, EXPIRY_KEY, time.time(), limit)
+    return [int(transaction_id) for transaction_id in due]
+
+
+def restore_due(transaction_ids):
+    """
+    Возвращает в множество таймеры, забранные pop_due, но не обработанные.
+    """
+    if not transaction_ids:
+        return
+    try:
+        now = time.time()
+        get_redis().zadd(EXPIRY_KEY, {transaction_id: now for transaction_id in transaction_ids})
+    except redis.RedisError as e:
+        logger.error(f"Ошибка возврата таймеров {transaction_ids}: {str(e)}")
@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# Приложение загружается до fork: воркеры делят код и стартуют быстрее
+preload_app = True
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    # Соединения, открытые в мастере при create_app, нельзя делить между процессами
+    from app import dispose_engines
+    from wsgi import app
+
+    dispose_engines(app)
@@ -0,0 +1,32 @@
+"""add users.transaction_ttl
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def has_column(table, column):
+    # Таблицы создает db.create_all(): на новой базе колонка уже есть, на старой - нет
+    return column in [c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def upgrade():
+    if not has_column('users', 'transaction_ttl'):
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('transaction_ttl', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('transaction_ttl')
@@ -3,8 +3,10 @@ from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from routing import RoutingSession
 
-db = SQLAlchemy()
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -15,6 +17,8 @@ class User(UserMixin, db.Model):
     balance = db.Column(db.Float, default=0.0)
     commission_rate = db.Column(db.Float, default=0.03)
     webhook_url = db.Column(db.String(255), default='http://localhost:5000/webhook')
+    # Время жизни транзакций пользователя в секундах, если не задано - берется TRANSACTION_TTL_SECONDS
+    transaction_ttl = db.Column(db.Integer, nullable=True)
     
     # Поле для хранения хэша пароля
     password_hash = db.Column("password_hash", db.String(128), nullable=False)
@@ -0,0 +1,130 @@
+import logging
+import random
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+
+logger = logging.getLogger(__name__)
+
+# Кэш измеренного отставания реплик: ключ bind -> (время проверки, отставание в секундах)
+_replica_lag = {}
+
+
+def read_only(view):
+    """
+    Помечает view как читающий: запросы в рамках этого HTTP-запроса
+    уходят на реплики, пока в нем не произошла запись.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def use_replica():
+    """
+    Разрешает чтение с реплик до конца текущего запроса.
+    """
+    if has_request_context():
+        g.db_read_only = True
+
+
+def pin_primary():
+    """
+    Закрепляет сессию за основной базой до конца текущего запроса.
+    """
+    if has_request_context():
+        g.db_pinned_primary = True
+
+
+def measure_lag(engine):
+    """
+    Возвращает отставание реплики в секундах.
+    Для PostgreSQL: если весь полученный WAL уже применен, реплика догнала основную базу
+    (время последней транзакции растет и при простое основной базы, поэтому его не учитываем),
+    иначе - время с момента последней примененной транзакции.
+    Для остальных СУБД (например, второй файл SQLite) отставание считается нулевым.
+    """
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as connection:
+        lag = connection.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )).scalar()
+    return float(lag or 0.0)
+
+
+def replica_lag(bind_key, engine):
+    """
+    Отставание реплики с кэшированием на REPLICA_LAG_CHECK_INTERVAL секунд.
+    Недоступная реплика считается бесконечно отстающей.
+    """
+    now = time.monotonic()
+    checked_at, lag = _replica_lag.get(bind_key, (None, None))
+    if checked_at is None or now - checked_at >= current_app.config['REPLICA_LAG_CHECK_INTERVAL']:
+        try:
+            lag = measure_lag(engine)
+        except Exception as e:
+            logger.error(f"Ошибка проверки реплики {bind_key}: {str(e)}")
+            lag = float('inf')
+        _replica_lag[bind_key] = (now, lag)
+    return lag
+
+
+def pick_replica(engines):
+    """
+    Выбирает случайную реплику, отставание которой не превышает REPLICA_MAX_LAG_SECONDS.
+    Возвращает None, если подходящих реплик нет.
+    """
+    max_lag = current_app.config['REPLICA_MAX_LAG_SECONDS']
+    healthy = [
+        engines[bind_key]
+        for bind_key in current_app.config['SQLALCHEMY_REPLICAS']
+        if bind_key in engines and replica_lag(bind_key, engines[bind_key]) <= max_lag
+    ]
+    if not healthy:
+        return None
+    return random.choice(healthy)
+
+
+def request_replica(engines):
+    """
+    Реплика текущего HTTP-запроса: выбирается один раз и переиспользуется,
+    чтобы все чтения запроса видели одни и те же данные.
+    """
+    if 'db_replica' not in g:
+        g.db_replica = pick_replica(engines)
+    return g.db_replica
+
+
+class RoutingSession(Session):
+    """
+    Сессия, отправляющая чтение в читающих view на реплики.
+    Запись (flush) и все запросы после нее в том же HTTP-запросе идут в основную базу.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._replica_allowed():
+            engine = request_replica(self._db.engines)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _replica_allowed():
+        return (
+            has_request_context()
+            and g.get('db_read_only', False)
+            and not g.get('db_pinned_primary', False)
+        )
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _pin_primary_on_write(session, flush_context, instances):
+    pin_primary()
@@ -0,0 +1,231 @@
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from flask import session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Сессия, данные которой хранятся на сервере, а в cookie - только подписанный ID.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    def regenerate(self):
+        """
+        Выдает сессии новый ID (защита от фиксации сессии); старый удаляется при сохранении.
+        """
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class RedisSessionStore:
+    """
+    Хранилище сессий в Redis, общее для всех процессов и узлов.
+    """
+
+    def __init__(self, url, prefix='session:'):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        return self.client.get(self.prefix + sid)
+
+    def set(self, sid, data, ttl):
+        self.client.set(self.prefix + sid, data, ex=ttl)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class LocalSessionStore:
+    """
+    Хранилище сессий в памяти процесса - замена Redis для разработки и тестов.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, sid):
+        with self.lock:
+            item = self.data.get(sid)
+            if item is None:
+                return None
+            data, expires = item
+            if expires <= time.monotonic():
+                del self.data[sid]
+                return None
+            return data
+
+    def set(self, sid, data, ttl):
+        with self.lock:
+            self.data[sid] = (data, time.monotonic() + ttl)
+
+    def delete(self, sid):
+        with self.lock:
+            self.data.pop(sid, None)
+
+
+class SessionCache:
+    """
+    Кэш горячих сессий в памяти процесса: уже десериализованные данные без обращения к хранилищу.
+    Записи и удаления в этом процессе обновляют кэш сразу; изменения из других процессов
+    становятся видны не позже чем через ttl секунд (ttl=0 отключает кэш).
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, sid):
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is None:
+                return None
+            data, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[sid]
+                return None
+            self.entries.move_to_end(sid)
+        # Копия: изменения сессии в запросе не должны попадать в кэш до сохранения
+        return copy.deepcopy(data)
+
+    def put(self, sid, data):
+        if self.ttl <= 0:
+            return
+        data = copy.deepcopy(data)
+        with self.lock:
+            self.entries[sid] = (data, time.monotonic() + self.ttl)
+            self.entries.move_to_end(sid)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, sid):
+        with self.lock:
+            self.entries.pop(sid, None)
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Серверные сессии: данные сериализуются компактным JSON и хранятся в store,
+    в cookie передается ID, подписанный SECRET_KEY.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, cache):
+        self.store = store
+        self.cache = cache
+
+    def get_signer(self, app):
+        return Signer(app.secret_key, salt='server-session')
+
+    def load(self, sid):
+        """
+        Данные сессии: из кэша процесса, иначе из хранилища (с сохранением в кэш).
+        """
+        data = self.cache.get(sid)
+        if data is not None:
+            return data
+        raw = self.store.get(sid)
+        if raw is None:
+            return None
+        data = self.serializer.loads(raw)
+        self.cache.put(sid, data)
+        return data
+
+    def delete(self, sid):
+        self.store.delete(sid)
+        self.cache.pop(sid)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self.get_signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.load(sid)
+                if data is not None:
+                    return ServerSession(data, sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self.delete(session.previous_sid)
+
+        if not session:
+            # Сессия очищена (например, logout) - удаляем данные и cookie
+            if session.modified and not session.new:
+                self.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        response.vary.add('Cookie')
+        if not self.should_set_cookie(app, session):
+            return
+
+        ttl = int(app.permanent_session_lifetime.total_seconds())
+        data = dict(session)
+        self.store.set(session.sid, self.serializer.dumps(data), ttl)
+        self.cache.put(session.sid, data)
+        response.set_cookie(
+            name,
+            self.get_signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def rotate_session(sender, **extra):
+    """
+    Обработчик сигнала user_logged_in: после входа сессия получает новый ID.
+    """
+    if isinstance(session._get_current_object(), ServerSession):
+        session.regenerate()
+
+
+def make_session_interface(app):
+    """
+    Создает интерфейс сессий по SESSION_TYPE: 'redis' или 'local'.
+    """
+    session_type = app.config['SESSION_TYPE']
+    if session_type == 'redis':
+        store = RedisSessionStore(app.config['SESSION_REDIS_URL'])
+    elif session_type == 'local':
+        store = LocalSessionStore()
+    else:
+        raise ValueError(f"Неизвестный SESSION_TYPE: {session_type}")
+
+    cache = SessionCache(app.config['SESSION_CACHE_SIZE'], app.config['SESSION_CACHE_TTL'])
+    return ServerSessionInterface(store, cache)
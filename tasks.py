@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 import requests
 import logging
-from app import create_app
+from app import create_app, dispose_engines
+from config import Config
 from celery import Celery
+from celery.signals import worker_process_init
 
-from models import db, Transaction, TaskSchedule
+from models import db, Transaction, TaskSchedule, User
+from expiry import pop_due, restore_due, expires_at, cancel_expiry
+from sqlalchemy.orm import joinedload
 
 
 # Настройка логгера
@@ -14,8 +18,14 @@ logger = logging.getLogger(__name__)
 # Создаем Celery приложение
 celery_app = Celery(
     'tasks',
-    broker='redis://localhost:6379/0',
-    backend='redis://localhost:6379/0',
+    broker=Config.REDIS_URL,
+    backend=Config.REDIS_URL,
+)
+
+celery_app.conf.update(
+    worker_pool=Config.WORKER_POOL,
+    worker_concurrency=Config.WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=Config.WORKER_PREFETCH_MULTIPLIER,
 )
 
 celery_app.conf.beat_schedule = {
@@ -23,6 +33,11 @@ celery_app.conf.beat_schedule = {
         'task': 'tasks.scheduler',
         'schedule': timedelta(seconds=1),
     },
+    # Таймеры истечения обрабатываются независимо от расписания дашборда
+    'expire-due-transactions': {
+        'task': 'tasks.expire_due_transactions',
+        'schedule': timedelta(seconds=Config.EXPIRY_POLL_INTERVAL_SECONDS),
+    },
 }
 
 celery_app.conf.timezone = 'UTC'
@@ -47,6 +62,12 @@ app = create_app()
 celery = make_celery(app)
 
 
+@worker_process_init.connect
+def reset_db_connections(**kwargs):
+    # Дочерние процессы prefork не должны использовать соединения родителя
+    dispose_engines(app)
+
+
 @celery.task
 def scheduler():
     """
@@ -58,7 +79,7 @@ def scheduler():
         for schedule in schedules:
             if not schedule.last_run or (now - schedule.last_run).total_seconds() >= schedule.interval_seconds:
                 try:
-                    # Запуск Celery задачи
+                    # Страховочная проверка на случай потерянных таймеров
                     check_expired_transactions()
                     # Обновляем отметку времени
                     schedule.last_run = now
@@ -86,22 +107,64 @@ def send_webhook(transaction):
             logger.error("Ошибка отправки вебхука для транзакции ID", transaction.id, str(e))
 
 
+@celery.task
+def expire_due_transactions():
+    """
+    Переводит в 'expired' транзакции, таймер которых уже истек.
+    Обрабатываются только наступившие таймеры, без сканирования всех 'pending'.
+    """
+    with app.app_context():
+        batch_size = app.config['EXPIRY_BATCH_SIZE']
+        due_ids = []
+        try:
+            while True:
+                due_ids = pop_due(batch_size)
+                if not due_ids:
+                    break
+
+                expired_transactions = Transaction.query.options(joinedload(Transaction.user)).filter(
+                    Transaction.id.in_(due_ids),
+                    Transaction.status == 'pending'
+                ).all()
+
+                for transaction in expired_transactions:
+                    transaction.status = 'expired'
+                    send_webhook(transaction)
+
+                db.session.commit()
+                logger.info("Истекло транзакций по таймерам: %d", len(expired_transactions))
+
+                if len(due_ids) < batch_size:
+                    break
+                due_ids = []
+        except Exception as e:
+            db.session.rollback()
+            # Возвращаем таймеры незафиксированной пачки, чтобы обработать их на следующем запуске
+            restore_due(due_ids)
+            logger.error(f"Ошибка при обработке таймеров транзакций: {str(e)}")
+
+
+@celery.task
 def check_expired_transactions():
     """
     Проверяет транзакции со статусом 'pending' и обновляет их на 'expired'.
+    Страховочная проверка: основную работу выполняет expire_due_transactions.
     """
     with app.app_context():
         now = datetime.now()
-        fifteen_minutes_ago = now - timedelta(minutes=15)
 
         logger.info("Запуск проверки истекших транзакций. Текущее время: %s", now)
 
-        # Поиск всех транзакций со статусом 'pending', созданных более 15 минут назад
         try:
-            expired_transactions = Transaction.query.filter(
+            # Кандидаты - транзакции старше минимального из настроенных TTL
+            min_user_ttl = db.session.query(db.func.min(User.transaction_ttl)).scalar()
+            min_ttl = min(ttl for ttl in (min_user_ttl, app.config['TRANSACTION_TTL_SECONDS']) if ttl is not None)
+
+            candidates = Transaction.query.options(joinedload(Transaction.user)).filter(
                 Transaction.status == 'pending',
-                Transaction.created_at < fifteen_minutes_ago
+                Transaction.created_at < now - timedelta(seconds=min_ttl)
             ).all()
+            expired_transactions = [transaction for transaction in candidates if expires_at(transaction) <= now]
 
             logger.info("Найдено истекших транзакций: %d", len(expired_transactions))
 
@@ -110,6 +173,7 @@ def check_expired_transactions():
                 db.session.add(transaction)
 
                 send_webhook(transaction)
+                cancel_expiry(transaction.id)
 
             db.session.commit()
             logger.info("Обновлено транзакций: %d", len(expired_transactions))
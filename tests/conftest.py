@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+
+
+# Корень проекта в sys.path и настройки окружения до импорта config:
+# основная база и реплика - два файла SQLite во временном каталоге
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_DIR = tempfile.mkdtemp()
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('SESSION_TYPE', 'local')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_DIR}/primary.db'
+os.environ['DATABASE_REPLICA_URLS'] = f'sqlite:///{DB_DIR}/replica.db'
+os.environ['REPLICA_LAG_CHECK_INTERVAL'] = '0'
+
+import pytest  # noqa: E402
+
+import expiry  # noqa: E402
+import tasks  # noqa: E402
+from models import db, User, Transaction  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    # tasks.py создает приложение при импорте; второе приложение в процессе не поддерживается
+    app = tasks.app
+    app.config['TESTING'] = True
+    with app.app_context():
+        replica = db.engines['replica_0']
+        db.metadata.create_all(replica)
+
+        # Одинаковый пользователь в обеих базах, транзакции различаются суммой
+        for engine, amount in ((db.engine, 1.0), (replica, 42.0)):
+            with engine.begin() as connection:
+                user = User(username='user')
+                user.set_password('password')
+                connection.execute(User.__table__.insert(), {
+                    'id': 1, 'username': 'user', 'role': 'regular', 'password_hash': user.password_hash,
+                })
+                connection.execute(Transaction.__table__.insert(), {
+                    'user_id': 1, 'amount': amount, 'commission': 0.0, 'status': 'pending',
+                })
+    return app
+
+
+class FakeRedis:
+    """
+    Отсортированные множества в памяти: только команды, которые использует expiry.py.
+    """
+
+    def __init__(self):
+        self.sets = {}
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update({str(member): score for member, score in mapping.items()})
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.sets.get(key, {}).pop(str(member), None)
+
+    def eval(self, script, numkeys, key, now, limit):
+        items = sorted(self.sets.get(key, {}).items(), key=lambda item: item[1])
+        due = [member for member, score in items if score <= now][:limit]
+        self.zrem(key, *due)
+        return due
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(expiry, 'get_redis', lambda: client)
+    monkeypatch.setattr(tasks, 'send_webhook', lambda transaction: None)
+    return client
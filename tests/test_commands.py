@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import pytest
+
+import expiry
+from models import db, User, Transaction
+
+
+def count_transactions():
+    return db.session.query(Transaction).count()
+
+
+def write_csv(path, rows):
+    path.write_text('created_at,user_id,amount,status\n' + ''.join(f'{row}\n' for row in rows))
+    return str(path)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_export_import_round_trip(app, fake_redis, tmp_path, extension):
+    runner = app.test_cli_runner()
+    with app.app_context():
+        rated = User(username=f'rated-{extension}', commission_rate=0.1, transaction_ttl=60, password_hash='-')
+        unrated = User(username=f'unrated-{extension}', password_hash='-')
+        db.session.add_all([rated, unrated])
+        db.session.flush()
+        # NULL ставку не задать через модель: у колонки есть значение по умолчанию
+        db.session.execute(User.__table__.update().where(User.id == unrated.id).values(commission_rate=None))
+        created_at = datetime(2026, 1, 1, 12, 0)
+        db.session.add_all([
+            Transaction(user_id=rated.id, amount=100.0, commission=0.0, status='pending', created_at=created_at),
+            Transaction(user_id=unrated.id, amount=50.0, commission=0.0, status='confirmed', created_at=created_at),
+        ])
+        db.session.commit()
+        exported_count = count_transactions()
+        last_id = db.session.query(db.func.max(Transaction.id)).scalar()
+        rated_id, unrated_id = rated.id, unrated.id
+
+    path = str(tmp_path / f'transactions.{extension}')
+    result = runner.invoke(args=['transactions', 'export', path, '--chunk-size', '2'])
+    assert result.exit_code == 0, result.output
+
+    exported = pq.read_table(path) if extension == 'parquet' else pa_csv.read_csv(path)
+    assert exported.num_rows == exported_count
+
+    result = runner.invoke(args=['transactions', 'import', path, '--chunk-size', '2'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        imported = Transaction.query.filter(Transaction.id > last_id).all()
+        assert len(imported) == exported_count
+
+        by_user = {t.user_id: t for t in imported if t.user_id in (rated_id, unrated_id)}
+        assert by_user[rated_id].commission == pytest.approx(10.0)
+        assert by_user[unrated_id].commission == 0.0
+
+        # Таймер только у pending-транзакции, срок - created_at + TTL пользователя
+        timers = fake_redis.sets[expiry.EXPIRY_KEY]
+        assert timers[str(by_user[rated_id].id)] == datetime(2026, 1, 1, 12, 1).timestamp()
+        assert str(by_user[unrated_id].id) not in timers
+
+
+def test_import_rejects_unknown_users_without_inserting(app, fake_redis, tmp_path):
+    path = write_csv(tmp_path / 'unknown.csv', [
+        '2026-01-01 12:00:00,1,10.0,pending',
+        '2026-01-01 12:00:00,999999,10.0,pending',
+    ])
+    with app.app_context():
+        before = count_transactions()
+
+    result = app.test_cli_runner().invoke(args=['transactions', 'import', path, '--chunk-size', '1'])
+
+    assert result.exit_code == 1
+    assert 'Неизвестные пользователи: [999999]' in result.output
+    with app.app_context():
+        assert count_transactions() == before
+
+
+def test_import_reports_malformed_file(app, fake_redis, tmp_path):
+    path = tmp_path / 'malformed.csv'
+    path.write_text('created_at,user_id,amount\n2026-01-01 12:00:00,1,10.0\n')
+
+    result = app.test_cli_runner().invoke(args=['transactions', 'import', str(path)])
+
+    assert result.exit_code == 1
+    assert 'Некорректный файл' in result.output
+    assert isinstance(result.exception, SystemExit)
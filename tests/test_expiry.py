@@ -0,0 +1,78 @@
+import time
+from datetime import datetime, timedelta
+
+import expiry
+import tasks
+from models import db, User, Transaction
+
+
+def make_user(username, ttl=None):
+    user = User(username=username, transaction_ttl=ttl, password_hash='-')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def make_transaction(user, age_seconds):
+    transaction = Transaction(
+        user_id=user.id, amount=10.0, commission=0.0, status='pending',
+        created_at=datetime.now() - timedelta(seconds=age_seconds),
+    )
+    db.session.add(transaction)
+    db.session.flush()
+    return transaction
+
+
+def test_transaction_ttl_prefers_user_setting(app):
+    with app.app_context():
+        assert expiry.transaction_ttl(User(transaction_ttl=60)) == 60
+        assert expiry.transaction_ttl(User()) == app.config['TRANSACTION_TTL_SECONDS']
+        assert expiry.transaction_ttl(None) == app.config['TRANSACTION_TTL_SECONDS']
+
+        created_at = datetime(2026, 1, 1, 12, 0)
+        transaction = Transaction(created_at=created_at, user=User(transaction_ttl=60))
+        assert expiry.expires_at(transaction) == created_at + timedelta(seconds=60)
+
+
+def test_sweep_uses_per_user_ttl(app, fake_redis):
+    with app.app_context():
+        short_ttl = make_user('short-ttl', ttl=60)
+        default_ttl = make_user('default-ttl')
+        short_expired = make_transaction(short_ttl, age_seconds=120)
+        default_pending = make_transaction(default_ttl, age_seconds=120)
+        default_expired = make_transaction(default_ttl, age_seconds=app.config['TRANSACTION_TTL_SECONDS'] + 60)
+        db.session.commit()
+        ids = [short_expired.id, default_pending.id, default_expired.id]
+
+        tasks.check_expired_transactions()
+
+        db.session.expire_all()
+        statuses = [db.session.get(Transaction, transaction_id).status for transaction_id in ids]
+        assert statuses == ['expired', 'pending', 'expired']
+
+
+def test_pop_due_returns_only_due_timers(app, fake_redis):
+    with app.app_context():
+        now = time.time()
+        fake_redis.zadd(expiry.EXPIRY_KEY, {1: now - 10, 2: now - 5, 3: now + 3600})
+
+        assert expiry.pop_due(limit=10) == [1, 2]
+        assert list(fake_redis.sets[expiry.EXPIRY_KEY]) == ['3']
+
+        expiry.restore_due([1, 2])
+        assert sorted(fake_redis.sets[expiry.EXPIRY_KEY]) == ['1', '2', '3']
+
+
+def test_failed_commit_restores_timers(app, fake_redis, monkeypatch):
+    with app.app_context():
+        transaction = make_transaction(make_user('commit-failure'), age_seconds=0)
+        db.session.commit()
+        fake_redis.zadd(expiry.EXPIRY_KEY, {transaction.id: time.time() - 1})
+
+        def failing_commit():
+            raise RuntimeError('commit failed')
+
+        monkeypatch.setattr(db.session, 'commit', failing_commit)
+        tasks.expire_due_transactions()
+
+        assert str(transaction.id) in fake_redis.sets[expiry.EXPIRY_KEY]
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import inspect
+
+import routing
+from config import Config
+from models import db, User, Transaction
+
+
+@pytest.fixture(autouse=True)
+def reset_lag_cache():
+    routing._replica_lag.clear()
+
+
+def test_check_transactions_reads_from_replica(app):
+    client = app.test_client()
+    client.post('/api/login', data={'username': 'user', 'password': 'password'})
+
+    response = client.get('/api/check_transaction')
+
+    assert response.status_code == 200
+    assert [t['amount'] for t in response.get_json()['transactions']] == [42.0]
+
+
+def test_flush_pins_request_to_primary(app):
+    with app.test_request_context():
+        routing.use_replica()
+        mapper = inspect(Transaction)
+        assert db.session.get_bind(mapper) is db.engines['replica_0']
+
+        db.session.add(Transaction(user_id=1, amount=10.0, commission=0.0))
+        db.session.flush()
+
+        assert db.session.get_bind(mapper) is db.engine
+        db.session.rollback()
+
+
+def test_lagging_replica_is_skipped(app, monkeypatch):
+    monkeypatch.setattr(routing, 'measure_lag', lambda engine: Config.REPLICA_MAX_LAG_SECONDS + 1)
+
+    with app.test_request_context():
+        routing.use_replica()
+        assert db.session.get_bind(inspect(Transaction)) is db.engine
+
+
+def test_admin_list_checks_access_on_primary(app):
+    with app.app_context():
+        replica = db.engines['replica_0']
+    # На отстающей реплике пользователь еще админ и видит чужую транзакцию
+    with replica.begin() as connection:
+        connection.execute(User.__table__.update().where(User.id == 1).values(role='admin'))
+        connection.execute(User.__table__.insert(), {
+            'id': 2, 'username': 'other', 'role': 'regular', 'password_hash': '-',
+        })
+        connection.execute(Transaction.__table__.insert(), {
+            'id': 777, 'user_id': 2, 'amount': 777.0, 'commission': 0.0, 'status': 'pending',
+        })
+    try:
+        client = app.test_client()
+        client.post('/api/login', data={'username': 'user', 'password': 'password'})
+
+        response = client.get('/admin/transaction/')
+
+        assert response.status_code == 200
+        assert b'42.0' in response.data
+        assert b'777.0' not in response.data
+    finally:
+        with replica.begin() as connection:
+            connection.execute(Transaction.__table__.delete().where(Transaction.id == 777))
+            connection.execute(User.__table__.delete().where(User.id == 2))
+            connection.execute(User.__table__.update().where(User.id == 1).values(role='regular'))
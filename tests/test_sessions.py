@@ -0,0 +1,63 @@
+import sessions
+from sessions import LocalSessionStore, ServerSessionInterface, SessionCache
+
+
+class CountingStore(LocalSessionStore):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def get(self, sid):
+        self.calls += 1
+        return super().get(sid)
+
+
+def test_cache_hit_makes_no_store_calls():
+    store = CountingStore()
+    interface = ServerSessionInterface(store, SessionCache(max_size=10, ttl=60))
+    store.set('sid', interface.serializer.dumps({'items': [1]}), ttl=60)
+
+    first = interface.load('sid')
+    first['items'].append(2)
+    second = interface.load('sid')
+
+    assert store.calls == 1
+    # Кэш отдает копию: изменения в одном запросе не видны другим
+    assert second == {'items': [1]}
+
+
+def test_other_process_changes_visible_after_cache_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sessions.time, 'monotonic', lambda: now[0])
+    store = LocalSessionStore()
+    # Два процесса с собственными кэшами над общим хранилищем
+    first = ServerSessionInterface(store, SessionCache(max_size=10, ttl=1))
+    second = ServerSessionInterface(store, SessionCache(max_size=10, ttl=1))
+
+    store.set('sid', first.serializer.dumps({'v': 1}), ttl=60)
+    assert second.load('sid') == {'v': 1}
+
+    first.delete('sid')
+    assert first.load('sid') is None
+    assert second.load('sid') == {'v': 1}
+
+    now[0] += 1
+    assert second.load('sid') is None
+
+
+def test_login_rotates_session_id(app):
+    client = app.test_client()
+    cookie_name = app.config['SESSION_COOKIE_NAME']
+    interface = app.session_interface
+
+    # Неудачный вход сохраняет flash-сообщение - появляется сессия до логина
+    client.post('/login', data={'username': 'user', 'password': 'wrong'})
+    old_cookie = client.get_cookie(cookie_name).value
+    old_sid = interface.get_signer(app).unsign(old_cookie).decode()
+    assert interface.load(old_sid) is not None
+
+    client.post('/login', data={'username': 'user', 'password': 'password'})
+    new_cookie = client.get_cookie(cookie_name).value
+
+    assert new_cookie != old_cookie
+    assert interface.load(old_sid) is None
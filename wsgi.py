@@ -0,0 +1,5 @@
+from app import create_app
+
+
+# Точка входа для gunicorn: приложение создается один раз в мастер-процессе (preload_app)
+app = create_app()